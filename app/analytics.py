@@ -1,25 +1,46 @@
 import pandas as pd
 import numpy as np
+from parsing import SCHEMA, parse_with_schema
+import parallel
 
 REQUIRED_COLS = ["date", "product", "region", "sales_amount", "cost", "customer_type"]
 
-def load_and_validate(path: str) -> pd.DataFrame:
+def load_and_validate(path: str, return_rejected: bool = False):
+    """Load Excel and parse it by SCHEMA.
+
+    With return_rejected=True returns (df, rejected), where `rejected` is the
+    report of dropped rows (row, column, value, reason).
+    """
     df = pd.read_excel(path)
     lc = {c.lower().strip(): c for c in df.columns}
     missing = [c for c in REQUIRED_COLS if c not in lc]
     if missing:
         raise ValueError(f"Missing columns: {missing}. Present: {list(df.columns)}")
     df = df.rename(columns={lc[c]: c for c in REQUIRED_COLS})
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["sales_amount"] = pd.to_numeric(df["sales_amount"], errors="coerce")
-    df["cost"] = pd.to_numeric(df["cost"], errors="coerce")
-    df = df.dropna(subset=["date", "sales_amount", "cost"]).copy()
+    df, rejected = parse_with_schema(df, SCHEMA)
     df["profit"] = df["sales_amount"] - df["cost"]
     df["margin"] = np.where(df["sales_amount"] > 0, df["profit"] / df["sales_amount"], np.nan)
     df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
     df["quarter"] = df["date"].dt.to_period("Q").dt.to_timestamp()
+    df = df.reset_index(drop=True)
+    if return_rejected:
+        return df, rejected
     return df
 
+def _group_sum(df: pd.DataFrame, keys, values: list[str]) -> pd.DataFrame:
+    """df.groupby(keys, as_index=False)[values].sum(); registered large frames go to the process pool."""
+    res = parallel.group_sum(df, keys, values)
+    if res is not None:
+        return res.reset_index()
+    return df.groupby(keys, as_index=False)[values].sum()
+
+def _pivot_sum(df: pd.DataFrame, index: str, columns: str, values: str) -> pd.DataFrame:
+    """pivot_table(aggfunc="sum", fill_value=0); registered large frames go to the process pool."""
+    res = parallel.group_sum(df, [index, columns], [values])
+    if res is not None:
+        return res[values].unstack(fill_value=0)
+    return df.pivot_table(index=index, columns=columns, values=values, aggfunc="sum", fill_value=0)
+
 def kpi(df: pd.DataFrame) -> dict:
     total_rev = float(df["sales_amount"].sum())
     avg_rev   = float(df["sales_amount"].mean())
@@ -27,7 +48,7 @@ def kpi(df: pd.DataFrame) -> dict:
     avg_margin = df["margin"].mean(skipna=True)
     avg_margin = float(avg_margin) if pd.notna(avg_margin) else None
 
-    by_month = df.groupby("month", as_index=False)["sales_amount"].sum().sort_values("month")
+    by_month = _group_sum(df, "month", ["sales_amount"]).sort_values("month")
     growth = None
     if len(by_month) >= 2:
         last, prev = by_month.iloc[-1]["sales_amount"], by_month.iloc[-2]["sales_amount"]
@@ -42,30 +63,36 @@ def kpi(df: pd.DataFrame) -> dict:
     }
 
 def monthly_trends(df: pd.DataFrame) -> pd.DataFrame:
-    return df.groupby("month", as_index=False)[["sales_amount","profit"]].sum().sort_values("month")
+    return _group_sum(df, "month", ["sales_amount","profit"]).sort_values("month")
 
 def quarterly_trends(df: pd.DataFrame) -> pd.DataFrame:
-    return df.groupby("quarter", as_index=False)[["sales_amount","profit"]].sum().sort_values("quarter")
+    return _group_sum(df, "quarter", ["sales_amount","profit"]).sort_values("quarter")
 
 def regional_breakdown(df: pd.DataFrame) -> pd.DataFrame:
-    return df.groupby("region", as_index=False)[["sales_amount","profit"]].sum().sort_values("sales_amount", ascending=False)
+    return _group_sum(df, "region", ["sales_amount","profit"]).sort_values("sales_amount", ascending=False)
 
-def top_bottom_products(df: pd.DataFrame, n:int=10):
-    by_prod = df.groupby("product", as_index=False)[["sales_amount","profit"]].sum()
+def product_totals(df: pd.DataFrame) -> pd.DataFrame:
+    return _group_sum(df, "product", ["sales_amount","profit"])
+
+def rank_products(by_prod: pd.DataFrame, n:int=10):
+    """Top/bottom n rows of product_totals() by profit."""
     top = by_prod.sort_values("profit", ascending=False).head(n)
     bottom = by_prod.sort_values("profit", ascending=True).head(n)
     return top, bottom
 
+def top_bottom_products(df: pd.DataFrame, n:int=10):
+    return rank_products(product_totals(df), n)
+
 # --- Extra aggregations for Full Excel ---
 def by_customer_type(df: pd.DataFrame) -> pd.DataFrame:
-    return df.groupby("customer_type", as_index=False)[["sales_amount","profit"]].sum().sort_values("sales_amount", ascending=False)
+    return _group_sum(df, "customer_type", ["sales_amount","profit"]).sort_values("sales_amount", ascending=False)
 
 def product_month_pivot_profit(df: pd.DataFrame) -> pd.DataFrame:
-    p = df.pivot_table(index="product", columns="month", values="profit", aggfunc="sum", fill_value=0)
+    p = _pivot_sum(df, "product", "month", "profit")
     return p.reset_index()
 
 def region_month_pivot_sales(df: pd.DataFrame) -> pd.DataFrame:
-    p = df.pivot_table(index="region", columns="month", values="sales_amount", aggfunc="sum", fill_value=0)
+    p = _pivot_sum(df, "region", "month", "sales_amount")
     return p.reset_index()
 
 def margins_describe(df: pd.DataFrame) -> pd.DataFrame:
@@ -80,7 +107,7 @@ def data_dictionary(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 def monthly_growth_table(df: pd.DataFrame) -> pd.DataFrame:
-    m = df.groupby("month", as_index=False)["sales_amount"].sum().sort_values("month")
+    m = _group_sum(df, "month", ["sales_amount"]).sort_values("month")
     m["growth_mom"] = m["sales_amount"].pct_change()
     return m
 
@@ -117,11 +144,30 @@ def apply_filters(
         out = out[out["region"].isin(regions)]
     if customer_types:
         out = out[out["customer_type"].isin(customer_types)]
+    parallel.derive(out, df)
     return out
 
+def is_narrower_filter(new: dict, old: dict | None) -> bool:
+    """True if every row passing `new` also passes `old`.
+
+    Then `new` can be applied to the result of `old` instead of the full frame.
+    Empty region / customer type lists mean "all".
+    """
+    if old is None:
+        return False
+    for key, tighter in (("date_from", lambda n, o: n >= o), ("date_to", lambda n, o: n <= o)):
+        o, n = old.get(key), new.get(key)
+        if o is not None and (n is None or not tighter(n, o)):
+            return False
+    for key in ("regions", "customer_types"):
+        o, n = set(old.get(key) or []), set(new.get(key) or [])
+        if o and (not n or not n <= o):
+            return False
+    return True
+
 def product_month_pivot_profit_filtered(df: pd.DataFrame) -> pd.DataFrame:
     """Pivot Product × Month (profit). Safe for empty df."""
     if df is None or df.empty:
         return pd.DataFrame(columns=["product"])
-    p = df.pivot_table(index="product", columns="month", values="profit", aggfunc="sum", fill_value=0)
+    p = _pivot_sum(df, "product", "month", "profit")
     return p.reset_index()
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# Колонки, которые показываем в процентах (как в RawValidated при экспорте)
+PCT_COLS = ("margin",)
+
+
+def _fmt_float(v):
+    return "" if v != v else f"{v:.2f}"
+
+
+def _fmt_pct(v):
+    return "" if v != v else f"{v * 100:.2f}%"
+
+
+def _fmt_datetime(v):
+    if np.isnat(v):
+        return ""
+    ts = pd.Timestamp(v)
+    return ts.strftime("%Y-%m-%d %H:%M") if (ts.hour or ts.minute) else ts.strftime("%Y-%m-%d")
+
+
+def _fmt_object(v):
+    return "" if pd.isna(v) else str(v)
+
+
+class ColumnArrayModel(QAbstractTableModel):
+    """Read-only table model over the column arrays of a DataFrame.
+
+    Cells are formatted on demand from numpy arrays, so nothing is copied into
+    widget items. Sorting only builds a row permutation; the arrays stay as is.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._columns: list[str] = []
+        self._arrays: list[np.ndarray] = []
+        self._formatters: list = []
+        self._numeric: list[bool] = []
+        self._order: np.ndarray | None = None  # None — исходный порядок строк
+        self._index = pd.RangeIndex(0)
+        self._nrows = 0
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+
+    def set_frame(self, df: pd.DataFrame | None):
+        self.beginResetModel()
+        if df is None:
+            df = pd.DataFrame()
+        old = (self._columns, self._index, self._order, self._sort_values())
+        self._columns = [str(c) for c in df.columns]
+        self._arrays = [df[c].to_numpy() for c in df.columns]
+        self._formatters = []
+        self._numeric = []
+        for name, arr in zip(self._columns, self._arrays):
+            if arr.dtype.kind == "M":
+                fmt, num = _fmt_datetime, False
+            elif arr.dtype.kind == "f":
+                fmt, num = (_fmt_pct if name in PCT_COLS else _fmt_float), True
+            elif arr.dtype.kind in "iub":
+                fmt, num = str, True
+            else:
+                fmt, num = _fmt_object, False
+            self._formatters.append(fmt)
+            self._numeric.append(num)
+        self._nrows = len(df)
+        self._index = df.index
+        # сузили фильтр — порядок берём из прежней сортировки, без пересортировки
+        self._order = self._narrowed_order(*old)
+        if self._order is None:
+            self._order = self._permutation(self._sort_column, self._sort_order)
+        self.endResetModel()
+
+    def _sort_values(self) -> np.ndarray | None:
+        if self._order is None or self._sort_column >= len(self._arrays):
+            return None
+        return self._arrays[self._sort_column]
+
+    def _narrowed_order(self, columns, index, order, values) -> np.ndarray | None:
+        """Sorted order of a frame whose rows are a subset of the previous one.
+
+        Kept rows are taken in the previous sorted order (matched by index
+        label), which costs a hash lookup instead of a sort. None when the new
+        frame isn't such a subset.
+        """
+        if values is None or columns != self._columns:
+            return None
+        if not (index.is_unique and self._index.is_unique):
+            return None
+        pos = self._index.get_indexer(index[order])
+        kept = pos >= 0
+        pos = pos[kept]
+        if len(pos) != self._nrows:
+            return None
+        # те же метки могут оказаться строками другого файла — значения колонки должны совпасть
+        same = pd.Series(values[order[kept]]).equals(pd.Series(self._arrays[self._sort_column][pos]))
+        return pos if same else None
+
+    def _permutation(self, column: int, order) -> np.ndarray | None:
+        if column < 0 or column >= len(self._arrays):
+            return None
+        s = pd.Series(self._arrays[column])
+        asc = order == Qt.AscendingOrder
+        # позиции строк, стабильная сортировка, пустые значения — в конце
+        try:
+            s = s.sort_values(ascending=asc, kind="stable", na_position="last")
+        except TypeError:
+            # смешанные типы в object-колонке — сортируем как строки
+            s = s.where(s.isna(), s.astype(str)).sort_values(ascending=asc, kind="stable", na_position="last")
+        return s.index.to_numpy()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._nrows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.DisplayRole:
+            row = index.row() if self._order is None else self._order[index.row()]
+            return self._formatters[col](self._arrays[col][row])
+        if role == Qt.TextAlignmentRole and self._numeric[col]:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column, self._sort_order = column, order
+        self._order = self._permutation(column, order)
+        self.layoutChanged.emit()
@@ -1,12 +1,16 @@
-from PySide6.QtWidgets import QApplication
+import multiprocessing
 import sys
-from ui import MainWindow
 
 def main():
+    # Qt и ui импортируются здесь: spawn-воркеры пула повторно импортируют этот модуль
+    from PySide6.QtWidgets import QApplication
+    from ui import MainWindow
+
     app = QApplication(sys.argv)
     w = MainWindow()
     w.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # пул агрегаций в собранном .exe
     main()
\ No newline at end of file
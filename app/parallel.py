@@ -0,0 +1,256 @@
+import atexit
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import parallel_worker
+
+# Ниже этого размера пул процессов не окупается — считаем через pandas
+PARALLEL_MIN_ROWS = 2_000_000
+MIN_CHUNK_ROWS = 250_000
+CHUNKS_PER_WORKER = 2
+# одно ядро остаётся GUI; больше 8 процессов упирается в память, а не в CPU
+MAX_WORKERS = max(1, min(8, (os.cpu_count() or 1) - 1))
+
+KEY_COLS = ("month", "quarter", "region", "product", "customer_type")
+VALUE_COLS = ("sales_amount", "profit")
+
+_pool: ProcessPoolExecutor | None = None
+_views: dict[int, "_View"] = {}
+
+
+def _unlink(blocks: list[shared_memory.SharedMemory]):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+    blocks.clear()
+
+
+def _put(blocks: list, arr: np.ndarray) -> tuple[str, str, int]:
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[:] = arr
+    blocks.append(shm)
+    return shm.name, arr.dtype.str, len(arr)
+
+
+def _token(s: pd.Series) -> int:
+    """Identity of a column's storage; changes when the column is reassigned."""
+    if pd.api.types.is_extension_array_dtype(s.dtype):
+        return id(s.array)
+    return s.to_numpy().__array_interface__["data"][0]
+
+
+class SharedDataset:
+    """Group codes and value columns of one loaded dataset in shared memory.
+
+    Built once per dataset: key columns are factorized (sorted uniques, int32
+    codes, -1 = missing), value columns copied as float64 with NaN -> 0, as
+    sum() skips them. Filtered views of the dataset only add their row
+    positions (see _View). Blocks are unlinked when the dataset is garbage
+    collected.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.nrows = len(df)
+        self._blocks: list[shared_memory.SharedMemory] = []
+        weakref.finalize(self, _unlink, self._blocks)
+        self.keys: dict[str, tuple] = {}    # col -> (spec, uniques, has_na)
+        self.values: dict[str, tuple] = {}  # col -> spec
+        for col in KEY_COLS:
+            if col in df.columns:
+                codes, uniques = pd.factorize(df[col], sort=True)
+                self.keys[col] = (_put(self._blocks, codes.astype("int32")), uniques, bool((codes < 0).any()))
+        for col in VALUE_COLS:
+            if col in df.columns:
+                arr = df[col].to_numpy(dtype="float64", na_value=np.nan)
+                self.values[col] = _put(self._blocks, np.nan_to_num(arr, nan=0.0))
+
+    def key_index(self, keys: tuple[str, ...], groups: np.ndarray) -> pd.Index:
+        """Decode sorted combined group codes back to the key values."""
+        levels = []
+        rest = groups
+        for col in reversed(keys):
+            uniques = self.keys[col][1]
+            rest, codes = np.divmod(rest, len(uniques))
+            levels.append(uniques.take(codes))
+        levels.reverse()
+        if len(keys) == 1:
+            return pd.Index(levels[0], name=keys[0])
+        return pd.MultiIndex.from_arrays(levels, names=list(keys))
+
+
+class _View:
+    """A registered frame: the dataset itself or a row subset of it."""
+
+    def __init__(self, df: pd.DataFrame, dataset: SharedDataset, full: bool):
+        self.ref = weakref.ref(df)
+        self.dataset = dataset
+        self.full = full
+        self.tokens = {c: _token(df[c]) for c in (*dataset.keys, *dataset.values)}
+        self._positions = None
+        # блок позиций живёт, пока жив сам вид, а не весь датасет
+        self._blocks: list[shared_memory.SharedMemory] = []
+        weakref.finalize(self, _unlink, self._blocks)
+
+    def valid(self, df: pd.DataFrame, cols) -> bool:
+        return self.ref() is df and all(self.tokens.get(c) == _token(df[c]) for c in cols)
+
+    def positions(self):
+        """Row positions in shared memory, created on first parallel use."""
+        if self.full:
+            return None
+        if self._positions is None:
+            idx = self.ref().index.to_numpy(dtype="int64")
+            self._positions = _put(self._blocks, idx)
+        return self._positions
+
+
+def _forget(key: int):
+    _views.pop(key, None)
+
+
+def _add_view(df: pd.DataFrame, view: _View):
+    key = id(df)
+    _views[key] = view
+    weakref.finalize(df, _forget, key)
+
+
+def register(df: pd.DataFrame) -> bool:
+    """Put a freshly loaded dataset into shared memory (once) and warm up the pool.
+
+    Needs a default RangeIndex, so that index labels of filtered views are
+    row positions in the dataset. Returns False if the dataset isn't served in
+    parallel, also when shared memory or worker processes can't be allocated.
+
+    The registered frame and its filtered views must be treated as immutable:
+    shared memory holds a copy, and in-place writes (df.loc[0, "cost"] = 1)
+    keep the column storage, so they go unnoticed and sums stay stale.
+    Register the frame again after such edits. Reassigned columns
+    (df["cost"] = ...) are detected and served by pandas.
+    """
+    if MAX_WORKERS < 2 or len(df) < PARALLEL_MIN_ROWS:
+        return False
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        return False
+    try:
+        warm_up()
+        dataset = SharedDataset(df)
+    except (OSError, MemoryError, BrokenProcessPool):
+        # нет места в /dev/shm или процессы не стартуют — остаёмся на pandas
+        _drop_pool()
+        return False
+    _add_view(df, _View(df, dataset, full=True))
+    return True
+
+
+def derive(view: pd.DataFrame, parent: pd.DataFrame):
+    """Mark `view` (rows of `parent` selected by filtering) as served by parent's dataset."""
+    reg = _views.get(id(parent))
+    if reg is None or view is parent or len(view) < PARALLEL_MIN_ROWS:
+        return
+    if not reg.valid(parent, reg.tokens):
+        return
+    ds = reg.dataset
+    full = len(view) == ds.nrows and view.index.equals(pd.RangeIndex(ds.nrows))
+    _add_view(view, _View(view, ds, full=full))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: одинаково на Windows/Linux и не форкает процесс с Qt;
+        # воркеры импортируют только parallel_worker (numpy), main.py — без Qt на верхнем уровне
+        _pool = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS, mp_context=mp.get_context("spawn"),
+            initializer=parallel_worker.init_worker,
+        )
+    return _pool
+
+
+def warm_up(wait: bool = False):
+    """Start all workers; by default in the background, without waiting for them."""
+    pool = _get_pool()
+    futures = [pool.submit(parallel_worker.ping) for _ in range(MAX_WORKERS)]
+    if wait:
+        for f in futures:
+            f.result()
+
+
+def _drop_pool():
+    """Abandon the pool without waiting for it (it may be broken)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+    _views.clear()
+
+
+atexit.register(shutdown)
+
+
+def _row_ranges(nrows: int):
+    nchunks = max(1, min(MAX_WORKERS * CHUNKS_PER_WORKER, nrows // MIN_CHUNK_ROWS))
+    bounds = np.linspace(0, nrows, nchunks + 1, dtype="int64")
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def group_sum(df: pd.DataFrame, keys, values) -> pd.DataFrame | None:
+    """Parallel equivalent of df.groupby(keys)[values].sum().
+
+    Returns None when `df` can't be served (not a registered dataset or view,
+    too small, unknown columns, or a column was reassigned since registration)
+    or the pool failed; the caller then falls back to pandas. A failed pool
+    also drops all registered views, so the rest of the session runs on pandas.
+
+    Workers sum row ranges straight from shared memory and return only
+    observed groups, which are merged here. Sums equal pandas' to within
+    float rounding, not bit for bit: pandas adds with Kahan compensation,
+    here they are plain float64 additions in a different order.
+    """
+    keys = (keys,) if isinstance(keys, str) else tuple(keys)
+    values = list(values)
+    view = _views.get(id(df))
+    if view is None or len(df) < PARALLEL_MIN_ROWS:
+        return None
+    ds = view.dataset
+    if not all(k in ds.keys for k in keys) or not all(v in ds.values for v in values):
+        return None
+    if not view.valid(df, (*keys, *values)):
+        _forget(id(df))
+        return None
+
+    key_specs = [(ds.keys[k][0], len(ds.keys[k][1]), ds.keys[k][2]) for k in keys]
+    value_specs = [ds.values[v] for v in values]
+    ranges = _row_ranges(len(df))
+    n = len(ranges)
+    try:
+        positions = view.positions()
+        results = list(_get_pool().map(
+            parallel_worker.partial_group_sums, [ds.nrows] * n, [key_specs] * n,
+            [value_specs] * n, [positions] * n, [a for a, _ in ranges], [b for _, b in ranges],
+        ))
+    except (BrokenProcessPool, OSError, MemoryError):
+        # воркер упал (например, убит по памяти) или не хватило shared memory
+        _drop_pool()
+        _views.clear()
+        return None
+
+    groups = np.concatenate([g for g, _ in results])
+    sums = np.hstack([s for _, s in results])
+    groups, inverse = np.unique(groups, return_inverse=True)
+    merged = [np.bincount(inverse, weights=row, minlength=len(groups)) for row in sums]
+    index = ds.key_index(keys, groups)
+    return pd.DataFrame({v: merged[i] for i, v in enumerate(values)}, index=index)
@@ -0,0 +1,79 @@
+"""Process-pool side of `parallel`.
+
+Kept free of pandas/Qt imports: spawned workers import only this module and numpy.
+"""
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Плотный bincount, пока комбинаций ключей не больше этого; дальше — np.unique
+DENSE_LIMIT = 1 << 20
+
+
+def init_worker():
+    """Pool initializer: importing it loads this module and numpy when the worker starts."""
+
+
+def ping():
+    return os.getpid()
+
+
+def _open_shm(name: str) -> shared_memory.SharedMemory:
+    """Attach to a block owned by the parent (it alone unlinks it)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # воркеры делят resource tracker с родителем, повторная регистрация безвредна
+        return shared_memory.SharedMemory(name=name)
+
+
+def _group_sums(arrays, nrows, keys, values, positions, start, stop):
+    if positions is None:
+        rows = slice(start, stop)
+    else:
+        rows = arrays(positions)[start:stop]
+    combined, valid, total = None, None, 1
+    for spec, size, has_na in keys:
+        codes = arrays(spec, nrows)[rows]
+        if has_na:
+            ok = codes >= 0
+            valid = ok if valid is None else valid & ok
+        combined = codes.astype(np.int64) if combined is None else combined * size + codes
+        total *= size
+    vals = [arrays(spec, nrows)[rows] for spec in values]
+    if valid is not None:
+        combined = combined[valid]
+        vals = [v[valid] for v in vals]
+
+    # наружу уходят только наблюдаемые группы, а не плотный массив всех комбинаций
+    if total <= DENSE_LIMIT:
+        counts = np.bincount(combined, minlength=total)
+        groups = np.flatnonzero(counts)
+        sums = [np.bincount(combined, weights=v, minlength=total)[groups] for v in vals]
+    else:
+        groups, inverse = np.unique(combined, return_inverse=True)
+        sums = [np.bincount(inverse, weights=v, minlength=len(groups)) for v in vals]
+    return groups, np.vstack(sums)
+
+
+def partial_group_sums(nrows, keys, values, positions, start, stop):
+    """Group sums over rows [start, stop) of the dataset, or of `positions` if given.
+
+    keys:      [((shm name, dtype), n uniques, has missing), ...]; codes < 0 are missing
+    values:    [(shm name, dtype), ...] float64 columns with NaN already zeroed
+    positions: (shm name, dtype, length) of row positions of a filtered view, or None
+    Returns (sorted combined group codes, sums with one row per value column).
+    """
+    blocks = []
+
+    def arrays(spec, n=None):
+        shm = _open_shm(spec[0])
+        blocks.append(shm)
+        return np.ndarray((spec[2] if n is None else n,), spec[1], buffer=shm.buf)
+
+    try:
+        return _group_sums(arrays, nrows, keys, values, positions, start, stop)
+    finally:
+        for shm in blocks:
+            shm.close()
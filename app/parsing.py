@@ -0,0 +1,367 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Схема колонок, которые нужно разобрать при валидации
+SCHEMA = {
+    "date": "date",
+    "sales_amount": "number",
+    "cost": "number",
+}
+
+# Excel хранит даты как число дней от 1899-12-30
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+EXCEL_SERIAL_RANGE = (1, 2958465)  # 1900-01-01 .. 9999-12-31
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%y",
+]
+
+SAMPLE_SIZE = 200
+
+_CURRENCY_RE = r"[\s\u00a0\u202f'’$€£₽]"
+# необязательная экспонента: 1e3, 1,5E-3
+_EXPONENT = r"(?:[eE][+-]?\d+)?"
+
+def _sample(s: pd.Series) -> pd.Series:
+    """Up to SAMPLE_SIZE non-null values at evenly spaced positions."""
+    if len(s) > 2 * SAMPLE_SIZE:
+        s = s.iloc[np.linspace(0, len(s) - 1, 2 * SAMPLE_SIZE).astype("int64")]
+    return s.dropna().iloc[:SAMPLE_SIZE]
+
+
+def detect_date_formats(strings: pd.Series) -> list[str]:
+    """Format that parses most of `strings`; several if that is ambiguous, [] if none.
+
+    Decided on a sample. Formats tied on it are ambiguous when they read the
+    same values as different dates ('01/02/2024': day or month first); then
+    the whole column decides, and all of them are returned if it doesn't.
+    """
+    sample = _sample(strings)
+    best, found = 0, []
+    for fmt in DATE_FORMATS:
+        dates = _to_ns(pd.to_datetime(sample, format=fmt, errors="coerce"))
+        ok = int(dates.notna().sum())
+        if ok and ok >= best:
+            if ok > best:
+                best, found = ok, []
+            found.append((fmt, dates))
+    fmt, dates = found[0] if found else (None, None)
+    # ничья на разных строках — это просто несколько форматов в колонке, их разберёт следующий проход
+    clash = [f for f, other in found[1:] if (dates.notna() & other.notna() & dates.ne(other)).any()]
+    if not clash:
+        return [fmt] if fmt else []
+    counts = {f: int(_to_datetime_fmt(strings, f).notna().sum()) for f in (fmt, *clash)}
+    top = max(counts.values())
+    return [f for f, n in counts.items() if n == top]
+
+
+def _prep_numbers(strings: pd.Series) -> pd.Series:
+    """Drop currency signs and space/apostrophe group separators, (123) -> -123."""
+    return (
+        strings.str.replace(_CURRENCY_RE, "", regex=True)
+        .str.replace(r"^\((.*)\)$", r"-\1", regex=True)
+    )
+
+
+def _grouped(thousands: str, min_groups: int = 1) -> str:
+    """Regex of an integer part with `thousands` grouping: 1,234 / 1.234.567."""
+    return rf"[+-]?\d{{1,3}}(?:{re.escape(thousands)}\d{{3}}){{{min_groups},}}"
+
+
+_OTHER_SEP = {".": ",", ",": "."}
+
+
+def detect_decimal_sep(strings: pd.Series) -> str:
+    """Guess decimal separator ('.' or ',') of a column from its unambiguous values.
+
+    Votes come from a sample: values with both separators (the rightmost one is
+    decimal), a single separator not followed by exactly 3 digits (decimal) and
+    a repeated separator (thousands, so the other one is decimal).
+    """
+    sample = _prep_numbers(_sample(strings))
+    votes = {}
+    for dec, th in _OTHER_SEP.items():
+        d = re.escape(dec)
+        votes[dec] = int(
+            sample.str.fullmatch(_grouped(th) + rf"{d}\d+").sum()
+            + sample.str.fullmatch(rf"[+-]?\d*{d}(?:\d{{1,2}}|\d{{4,}}){_EXPONENT}").sum()
+            + sample.str.fullmatch(_grouped(th, 2)).sum()
+        )
+    return "," if votes[","] > votes["."] else "."
+
+
+def _normalize_numbers(body: pd.Series, sep: str) -> pd.Series:
+    """Rewrite prepared strings to '1234.5' form; None where a value doesn't fit.
+
+    A value with both separators or a repeated one describes itself. A value
+    with a single separator ('1,234', '5,5') is read by the column guess `sep`;
+    if it can't be read that way (e.g. '12.5' in a comma-decimal column) it is
+    left unparsed and ends up in the rejected report. Signs and exponents
+    ('+5', '1,5e3') are kept for to_numeric.
+    """
+    conds = [body.str.fullmatch(rf"[+-]?\d+{_EXPONENT}")]
+    choices = [body]
+    for dec, th in _OTHER_SEP.items():
+        conds.append(body.str.fullmatch(_grouped(th) + rf"{re.escape(dec)}\d+"))
+        choices.append(body.str.replace(th, "", regex=False).str.replace(dec, ".", regex=False))
+        conds.append(body.str.fullmatch(_grouped(th, 2)))
+        choices.append(body.str.replace(th, "", regex=False))
+    th = _OTHER_SEP[sep]
+    conds.append(body.str.fullmatch(rf"[+-]?\d*{re.escape(sep)}\d+{_EXPONENT}"))
+    choices.append(body.str.replace(sep, ".", regex=False))
+    conds.append(body.str.fullmatch(_grouped(th)))
+    choices.append(body.str.replace(th, "", regex=False))
+    out = np.select([c.to_numpy(dtype=bool) for c in conds],
+                    [c.to_numpy(dtype=object) for c in choices], default=None)
+    return pd.Series(out, index=body.index, dtype=object)
+
+
+def parse_excel_serial(s: pd.Series) -> pd.Series:
+    """Vectorized Excel serial number -> datetime. Out-of-range values become NaT."""
+    num = pd.to_numeric(s, errors="coerce").astype("float64")
+    lo, hi = EXCEL_SERIAL_RANGE
+    num = num.where((num >= lo) & (num <= hi))
+    return EXCEL_EPOCH + pd.to_timedelta(num, unit="D")
+
+
+_FIELD_WIDTHS = {"%Y": 4, "%y": 2, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+
+
+def _fixed_layout(fmt: str):
+    """[(token, start, width)] for digit-only formats like '%d.%m.%Y', else None."""
+    layout, pos = [], 0
+    for tok in re.findall(r"%.|[^%]", fmt):
+        if tok.startswith("%"):
+            if tok not in _FIELD_WIDTHS:
+                return None
+            width = _FIELD_WIDTHS[tok]
+        else:
+            width = 1
+        layout.append((tok, pos, width))
+        pos += width
+    return layout, pos
+
+
+def _parse_fixed_width(strings: pd.Series, fmt: str) -> pd.Series | None:
+    """Vectorized parse of zero-padded fixed-width dates by slicing code points.
+
+    Returns None if the format isn't fixed-width; values that don't fit
+    (other length, wrong separator, bad day/month, year outside 1678–2261) are NaT.
+    """
+    fixed = _fixed_layout(fmt)
+    if fixed is None:
+        return None
+    layout, width = fixed
+    u = strings.to_numpy(dtype=str)
+    n = len(u)
+    maxw = max(u.dtype.itemsize // 4, width)
+    codes = np.zeros((n, maxw), dtype=np.uint32)
+    if u.dtype.itemsize:
+        codes[:, :u.dtype.itemsize // 4] = u.view(np.uint32).reshape(n, -1)
+    ok = np.char.str_len(u) == width
+    digits = codes.astype(np.int64) - ord("0")
+    f = {}
+    for tok, start, w in layout:
+        if not tok.startswith("%"):
+            ok &= codes[:, start] == ord(tok)
+            continue
+        part = digits[:, start:start + w]
+        ok &= ((part >= 0) & (part <= 9)).all(axis=1)
+        f[tok] = part @ (10 ** np.arange(w - 1, -1, -1))
+    if "%y" in f:
+        # как strptime: 69–99 -> 19xx, 00–68 -> 20xx
+        f["%Y"] = np.where(f["%y"] >= 69, 1900, 2000) + f["%y"]
+    year, month, day = f.get("%Y"), f.get("%m"), f.get("%d")
+    if year is None or month is None or day is None:
+        return None
+    # вне диапазона datetime64[ns] (1677–2262) — NaT, а не переполнение при приведении
+    ok &= (month >= 1) & (month <= 12) & (day >= 1) & (year >= 1678) & (year <= 2261)
+    months = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype("datetime64[M]")
+    start = months.astype("datetime64[D]")
+    ok &= day <= (months + 1).astype("datetime64[D]") - start
+    ts = start + (day - 1).astype("timedelta64[D]")
+    ts = ts.astype("datetime64[s]")
+    for tok, unit, limit in (("%H", "h", 24), ("%M", "m", 60), ("%S", "s", 60)):
+        if tok in f:
+            ok &= f[tok] < limit
+            ts = ts + f[tok].astype(f"timedelta64[{unit}]")
+    ts[~ok] = np.datetime64("NaT")
+    return pd.Series(ts.astype("datetime64[ns]"), index=strings.index)
+
+
+def _to_ns(ts: pd.Series) -> pd.Series:
+    """datetime64[ns] of a pandas parse result; dates outside its range are NaT.
+
+    pandas 3 parses strings to datetime64[us], where '01.01.3000' is a valid date.
+    """
+    if ts.dtype == "datetime64[ns]" or not isinstance(ts.dtype, np.dtype):
+        return ts
+    return ts.where((ts >= pd.Timestamp.min) & (ts <= pd.Timestamp.max)).astype("datetime64[ns]")
+
+
+def _to_datetime_fmt(strings: pd.Series, fmt: str) -> pd.Series:
+    """pd.to_datetime(format=fmt, errors="coerce"), fixed-width formats decoded with numpy."""
+    if fmt.startswith("%Y-%m-%d"):
+        # ISO у pandas и так на быстром пути
+        return _to_ns(pd.to_datetime(strings, format=fmt, errors="coerce"))
+    parsed = _parse_fixed_width(strings, fmt)
+    if parsed is None:
+        return _to_ns(pd.to_datetime(strings, format=fmt, errors="coerce"))
+    # без ведущих нулей ('5.3.2024') и прочее — через strptime, только промахи
+    miss = parsed.isna().to_numpy()
+    if miss.any():
+        miss = miss & strings.notna().to_numpy()
+    if miss.any():
+        parsed.iloc[miss] = _to_ns(pd.to_datetime(strings[miss], format=fmt, errors="coerce")).to_numpy()
+    return parsed
+
+
+def _split_strings(s: pd.Series) -> tuple[str, np.ndarray | None]:
+    """infer_dtype of `s` and, only for mixed columns, a mask of its str values."""
+    kind = pd.api.types.infer_dtype(s, skipna=True)
+    if kind in ("string", "empty"):
+        return kind, None
+    return kind, s.map(type).eq(str).to_numpy()
+
+
+def _parse_date_strings(strings: pd.Series) -> pd.Series:
+    formats = detect_date_formats(strings)
+    parsed = _to_datetime_fmt(strings, formats[0]) if len(formats) == 1 else \
+        pd.Series(pd.NaT, index=strings.index, dtype="datetime64[ns]")
+    rest = parsed.isna().to_numpy()
+    if rest.any():
+        rest = rest & strings.notna().to_numpy()
+    if not rest.any():
+        return parsed
+    # промахи: убираем пробелы и определяем формат заново — в колонке их может быть несколько
+    missed = strings[rest].str.strip()
+    missed = missed[missed.ne("")]
+    while not missed.empty:
+        formats = detect_date_formats(missed)
+        if len(formats) != 1:
+            break
+        chunk = _to_datetime_fmt(missed, formats[0])
+        ok = chunk.notna()
+        if not ok.any():
+            break
+        parsed.loc[chunk.index[ok]] = chunk[ok]
+        missed = missed[~ok]
+    if len(formats) > 1:
+        # '01/02/2024' — и 1 февраля, и 2 января: не угадываем, такие строки уйдут в отчёт
+        fits = np.zeros(len(missed), dtype=bool)
+        for fmt in formats:
+            fits |= _to_datetime_fmt(missed, fmt).notna().to_numpy()
+        missed = missed[~fits]
+    # то, что не подошло ни под один формат, — медленный путь, только для остатка
+    if not missed.empty:
+        parsed.loc[missed.index] = _to_ns(pd.to_datetime(missed, format="mixed", errors="coerce"))
+    return parsed
+
+
+def parse_date_column(s: pd.Series, name: str = "date") -> pd.Series:
+    """Parse a mixed column of datetimes, Excel serials and strings."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    if pd.api.types.is_numeric_dtype(s):
+        return parse_excel_serial(s)
+
+    kind, is_str = _split_strings(s)
+    if kind == "string":
+        return _parse_date_strings(s)
+    if kind in ("integer", "floating", "mixed-integer-float", "decimal"):
+        return parse_excel_serial(s)
+    if kind in ("datetime", "datetime64", "date", "empty"):
+        return pd.to_datetime(s, errors="coerce")
+
+    out = pd.Series(pd.NaT, index=s.index, dtype="datetime64[ns]")
+    other = ~is_str & s.notna().to_numpy()
+    is_num = np.zeros(len(s), dtype=bool)
+    is_num[other] = pd.to_numeric(s[other], errors="coerce").notna().to_numpy()
+    is_dt = other & ~is_num
+
+    if is_num.any():
+        out.iloc[is_num] = parse_excel_serial(s[is_num]).to_numpy()
+    if is_dt.any():
+        out.iloc[is_dt] = _to_ns(pd.to_datetime(s[is_dt], errors="coerce")).to_numpy()
+    if is_str.any():
+        out.iloc[is_str] = _parse_date_strings(s[is_str]).to_numpy()
+    return out
+
+
+def parse_number_column(s: pd.Series, name: str = "") -> pd.Series:
+    """Parse a numeric column that may contain localized strings ('1 234,50', '1,234.50')."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+
+    kind, is_str = _split_strings(s)
+    if kind == "string":
+        strings = s
+    elif kind == "empty" or not is_str.any():
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+    else:
+        strings = s[is_str]
+
+    sep = detect_decimal_sep(strings)
+    parsed = pd.Series(np.nan, index=strings.index)
+    todo = np.ones(len(strings), dtype=bool)
+    if sep == ".":
+        # частый случай '1234.5' — сразу через to_numeric; '1,234' и '1 234' сюда не проходят
+        fast = pd.to_numeric(strings, errors="coerce")
+        parsed[:] = fast.to_numpy(dtype="float64")
+        todo = fast.isna().to_numpy()
+    if todo.any():
+        todo = todo & strings.notna().to_numpy()
+    if todo.any():
+        norm = _normalize_numbers(_prep_numbers(strings[todo]), sep)
+        parsed.iloc[todo] = pd.to_numeric(norm, errors="coerce").to_numpy(dtype="float64")
+    if kind == "string":
+        return parsed
+    out = pd.to_numeric(s.where(~is_str), errors="coerce").astype("float64")
+    out.iloc[is_str] = parsed.to_numpy()
+    return out
+
+
+def parse_with_schema(df: pd.DataFrame, schema: dict[str, str] | None = None):
+    """Parse schema columns in place of raw ones.
+
+    Returns (parsed_df, rejected) where `rejected` lists every dropped row with
+    its Excel row number, column, raw value and reason.
+    """
+    schema = schema or SCHEMA
+    parsers = {"date": parse_date_column, "number": parse_number_column}
+    out = df.copy()
+    bad = np.zeros(len(df), dtype=bool)
+    reports = []
+    for col, kind in schema.items():
+        raw = df[col]
+        parsed = parsers[kind](raw, col)
+        failed = parsed.isna().to_numpy()
+        if failed.any():
+            raw_failed = raw[failed]
+            missing = (raw_failed.isna() | raw_failed.astype(str).str.strip().eq("")).to_numpy()
+            reason = np.where(missing, "missing value", f"unparseable {kind}")
+            reports.append(pd.DataFrame({
+                "row": np.flatnonzero(failed) + 2,  # +1 за заголовок, +1 за 1-индексацию Excel
+                "column": col,
+                "value": raw_failed.astype(str).to_numpy(),
+                "reason": reason,
+            }))
+            bad |= failed
+        out[col] = parsed
+
+    if reports:
+        rejected = pd.concat(reports, ignore_index=True).sort_values(["row", "column"], ignore_index=True)
+    else:
+        rejected = pd.DataFrame(columns=["row", "column", "value", "reason"])
+    return out[~bad].copy(), rejected
@@ -2,9 +2,9 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QFileDialog, QMessageBox,
     QVBoxLayout, QHBoxLayout, QLabel, QTabWidget, QPushButton,
     QSpacerItem, QSizePolicy, QDockWidget, QListWidget, QListWidgetItem,
-    QDateEdit, QSpinBox, QFormLayout
+    QDateEdit, QSpinBox, QFormLayout, QTableView, QHeaderView, QAbstractItemView
 )
-from PySide6.QtCore import Qt, QDate
+from PySide6.QtCore import Qt, QDate, QTimer
 from matplotlib.figure import Figure
 from PySide6.QtGui import QAction, QFont, QIcon
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
@@ -12,12 +12,15 @@ from matplotlib.figure import Figure
 from analytics import (
     load_and_validate, kpi, monthly_trends, quarterly_trends,
     regional_breakdown, top_bottom_products, get_filter_options, apply_filters,
-    product_month_pivot_profit_filtered
+    product_month_pivot_profit_filtered, product_totals, rank_products,
+    is_narrower_filter
 )
 from charts import (
     revenue_trend_with_fit, regional_pie, quarterly_trend_chart, margin_hist,
     heatmap_product_month
 )
+from data_model import ColumnArrayModel
+import parallel
 
 
 import pandas as pd
@@ -36,12 +39,15 @@ from charts import (
 from export import export_pdf, export_excel_full, export_pngs
 
 class MainWindow(QMainWindow):
+    FILTER_DEBOUNCE_MS = 300
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Sales Analytics (Stage D — Full Excel)")
         self.resize(1240, 820)
 
         self.df: pd.DataFrame | None = None
+        self.rejected: pd.DataFrame | None = None
         self.figures = []
 
         # Menu
@@ -81,6 +87,16 @@ class MainWindow(QMainWindow):
             "customer_types": [],
             "top_n": 5,
         }
+        # кэш последнего результата фильтрации для инкрементального сужения
+        self._last_filters: dict | None = None
+        self._df_filtered: pd.DataFrame | None = None
+        self._by_prod: pd.DataFrame | None = None
+
+        # debounce: фильтры применяются сами через FILTER_DEBOUNCE_MS после последнего изменения
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.on_apply_filters)
 
         self.dock = QDockWidget("Filters", self)
         self.dock.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
@@ -118,12 +134,19 @@ class MainWindow(QMainWindow):
         self.btn_apply.clicked.connect(self.on_apply_filters)
         self.btn_reset.clicked.connect(self.on_reset_filters)
 
+        self.dt_from.dateChanged.connect(self.schedule_filters)
+        self.dt_to.dateChanged.connect(self.schedule_filters)
+        self.lst_regions.itemSelectionChanged.connect(self.schedule_filters)
+        self.lst_ctypes.itemSelectionChanged.connect(self.schedule_filters)
+        self.spin_topn.valueChanged.connect(self.schedule_filters)
+
         # путь к папке assets рядом с ui.py
         assets_dir = Path(__file__).with_name("assets")
         icon_overview = QIcon(str(assets_dir / "overview.svg"))
         icon_charts = QIcon(str(assets_dir / "charts.svg"))
         icon_heatmap = QIcon(str(assets_dir / "heatmap.svg"))
         icon_more = QIcon(str(assets_dir / "more.svg"))
+        icon_data = QIcon(str(assets_dir / "data.svg"))
 
         # Overview tab
         self.tab_overview = QWidget()
@@ -180,6 +203,26 @@ class MainWindow(QMainWindow):
         mc_layout.addWidget(self.canvas_quarter)
         mc_layout.addWidget(self.canvas_margin)
 
+        # Data tab: строки читаются моделью по требованию, без QTableWidgetItem
+        self.tab_data = QWidget()
+        self.tabs.addTab(self.tab_data, icon_data, "Data")
+        data_layout = QVBoxLayout(self.tab_data)
+        self.data_model = ColumnArrayModel(self)
+        self.data_view = QTableView()
+        self.data_view.setModel(self.data_model)
+        self.data_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.data_view.setWordWrap(False)
+        # фиксированная высота строк — view не измеряет миллионы строк
+        vh = self.data_view.verticalHeader()
+        vh.setSectionResizeMode(QHeaderView.Fixed)
+        vh.setDefaultSectionSize(self.data_view.fontMetrics().height() + 6)
+        self.data_view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.data_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.data_view.setSortingEnabled(True)
+        self.data_rows_label = QLabel("")
+        data_layout.addWidget(self.data_view)
+        data_layout.addWidget(self.data_rows_label)
+
         # Bottom bar with quick export buttons
         bar = QHBoxLayout()
         self.btn_export_pdf = QPushButton("Export PDF"); self.btn_export_pdf.setEnabled(False)
@@ -205,7 +248,9 @@ class MainWindow(QMainWindow):
             "2) Overview: KPIs + Top/Bottom products\n"
             "3) Charts: Revenue trend (with trend line) + Regional pie\n"
             "4) More Charts: Quarterly revenue + Margin histogram\n"
-            "5) Export: PDF/PNGs and Full Excel Summary (many sheets with formatting)"
+            "5) Export: PDF/PNGs and Full Excel Summary (many sheets with formatting)\n"
+            "6) Filters (left panel) apply automatically shortly after any change\n"
+            "7) Data: validated rows after filters; click a header to sort"
         )
 
     def on_load_excel(self):
@@ -213,12 +258,23 @@ class MainWindow(QMainWindow):
         if not path:
             return
         try:
-            df = load_and_validate(path)
+            df, rejected = load_and_validate(path, return_rejected=True)
         except Exception as e:
             QMessageBox.critical(self, "Validation error", str(e))
             return
 
         self.df = df
+        self.rejected = rejected
+        # большой файл: один раз кладём колонки в shared memory и заранее поднимаем пул
+        parallel.register(df)
+        if not rejected.empty:
+            nrows = rejected["row"].nunique()
+            reasons = rejected.groupby("reason").size().to_dict()
+            details = "\n".join(f"  {r}: {n}" for r, n in reasons.items())
+            QMessageBox.warning(self, "Rejected rows",
+                f"{nrows} row(s) were skipped during validation:\n{details}\n\n"
+                "See the RejectedRows sheet in Export Excel Summary (Full)."
+            )
         # populate filters
         opts = get_filter_options(self.df)
         # даты
@@ -238,6 +294,10 @@ class MainWindow(QMainWindow):
             item = QListWidgetItem(str(ct)); item.setSelected(False)
             self.lst_ctypes.addItem(item)
 
+        self._last_filters = None
+        self._df_filtered = None
+        self.filters = self.current_filters()
+        self.filter_timer.stop()
         self.refresh_all()
 
         for act in (self.act_export_pdf, self.act_export_excel, self.act_export_png):
@@ -262,8 +322,19 @@ class MainWindow(QMainWindow):
             "top_n": top_n
         }
 
+    def schedule_filters(self, *_):
+        if self.df is not None:
+            self.filter_timer.start()
+
     def on_apply_filters(self):
+        self.filter_timer.stop()
         self.filters = self.current_filters()
+        same = (is_narrower_filter(self.filters, self._last_filters)
+                and is_narrower_filter(self._last_filters, self.filters))
+        if same and self._by_prod is not None:
+            # изменился только top-N — пересортировать кэшированные агрегаты
+            self.refresh_top_bottom()
+            return
         self.refresh_all()
 
     def on_reset_filters(self):
@@ -277,6 +348,7 @@ class MainWindow(QMainWindow):
             self.dt_from.setDate(QDate(opts["date_min"].year, opts["date_min"].month, opts["date_min"].day))
             self.dt_to.setDate(QDate(opts["date_max"].year, opts["date_max"].month, opts["date_max"].day))
         self.spin_topn.setValue(5)
+        self.filter_timer.stop()
         self.filters = self.current_filters()
         self.refresh_all()
 
@@ -284,15 +356,22 @@ class MainWindow(QMainWindow):
         if self.df is None:
             return
 
-        # 1) применяем фильтры
+        # 1) применяем фильтры; если новый фильтр уже предыдущего — фильтруем прошлый результат
         f = self.filters
+        base = self.df
+        if self._df_filtered is not None and is_narrower_filter(f, self._last_filters):
+            base = self._df_filtered
         df_filtered = apply_filters(
-            self.df,
+            base,
             date_from=f.get("date_from"),
             date_to=f.get("date_to"),
             regions=f.get("regions") or None,
             customer_types=f.get("customer_types") or None,
         )
+        self._df_filtered = df_filtered
+        self._last_filters = dict(f)
+        self.data_model.set_frame(df_filtered)
+        self.data_rows_label.setText(f"Rows: {len(df_filtered):,} of {len(self.df):,}")
 
         # 2) KPI
         k = kpi(df_filtered if not df_filtered.empty else self.df)
@@ -308,17 +387,8 @@ class MainWindow(QMainWindow):
         self.kpi_label.setText("\n".join(lines))
 
         # 3) Top/Bottom по отфильтрованным
-        top_n = max(1, int(f.get("top_n") or 5))
-        top, bottom = top_bottom_products(df_filtered if not df_filtered.empty else self.df, n=top_n)
-
-        def fmt(df):
-            if df.empty:
-                return "—"
-            return "\n".join(f"{row.product:<12}  profit={row.profit:.2f}  sales={row.sales_amount:.2f}" for row in
-                             df.itertuples(index=False))
-
-        tb_txt = f"Top {top_n} products by profit:\n{fmt(top)}\n\nBottom {top_n} products by profit:\n{fmt(bottom)}"
-        self.top_bottom_label.setText(tb_txt)
+        self._by_prod = product_totals(df_filtered if not df_filtered.empty else self.df)
+        self.refresh_top_bottom()
 
         # 4) Графики по отфильтрованным
         m = monthly_trends(df_filtered) if not df_filtered.empty else monthly_trends(self.df)
@@ -363,6 +433,19 @@ class MainWindow(QMainWindow):
             self.canvas_heatmap.figure,
         ]
 
+    def refresh_top_bottom(self):
+        top_n = max(1, int(self.filters.get("top_n") or 5))
+        top, bottom = rank_products(self._by_prod, n=top_n)
+
+        def fmt(df):
+            if df.empty:
+                return "—"
+            return "\n".join(f"{row.product:<12}  profit={row.profit:.2f}  sales={row.sales_amount:.2f}" for row in
+                             df.itertuples(index=False))
+
+        tb_txt = f"Top {top_n} products by profit:\n{fmt(top)}\n\nBottom {top_n} products by profit:\n{fmt(bottom)}"
+        self.top_bottom_label.setText(tb_txt)
+
     def on_export_pdf(self):
         if not self.figures:
             return
@@ -395,6 +478,9 @@ class MainWindow(QMainWindow):
                 "MonthlyGrowth": monthly_growth_table,
                 "DataDictionary": data_dictionary,
             }
+            if self.rejected is not None and not self.rejected.empty:
+                rejected = self.rejected
+                compute_funcs["RejectedRows"] = lambda d: rejected
             export_excel_full(self.df, path, compute_funcs, kpi)
             QMessageBox.information(self, "Excel Export", "Full Excel summary saved.")
         except Exception as e:
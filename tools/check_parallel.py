@@ -0,0 +1,151 @@
+"""Check that the process-pool aggregations match pandas (to float rounding), and time them.
+
+    python tools/check_parallel.py                 # equality check, 300k rows, 4 workers
+    python tools/check_parallel.py --bench 20000000 --workers 8
+
+Run it after touching app/parallel.py, app/parallel_worker.py or PARALLEL_MIN_ROWS.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import analytics  # noqa: E402
+import parallel  # noqa: E402
+
+FUNCS = {
+    "kpi": analytics.kpi,
+    "monthly_trends": analytics.monthly_trends,
+    "quarterly_trends": analytics.quarterly_trends,
+    "regional_breakdown": analytics.regional_breakdown,
+    "top_bottom_products": lambda d: analytics.top_bottom_products(d, n=10),
+    "by_customer_type": analytics.by_customer_type,
+    "product_month_pivot_profit": analytics.product_month_pivot_profit,
+    "region_month_pivot_sales": analytics.region_month_pivot_sales,
+    "monthly_growth_table": analytics.monthly_growth_table,
+    "product_month_pivot_profit_filtered": analytics.product_month_pivot_profit_filtered,
+}
+
+
+def make_frame(n: int, products: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """Synthetic frame shaped like load_and_validate() output."""
+    rng = np.random.default_rng(seed)
+    date = pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 1100, n), unit="D")
+    df = pd.DataFrame({
+        "date": date,
+        "product": pd.Series([f"P{i:05d}" for i in range(products)]).to_numpy()[rng.integers(0, products, n)],
+        "region": np.array(["North", "South", "East", "West", None], dtype=object)[rng.integers(0, 5, n)],
+        "customer_type": np.array(["B2B", "B2C", "Gov"], dtype=object)[rng.integers(0, 3, n)],
+        "sales_amount": rng.random(n) * 1000,
+        "cost": rng.random(n) * 800,
+    })
+    df["profit"] = df["sales_amount"] - df["cost"]
+    df["margin"] = np.where(df["sales_amount"] > 0, df["profit"] / df["sales_amount"], np.nan)
+    df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
+    df["quarter"] = df["date"].dt.to_period("Q").dt.to_timestamp()
+    return df
+
+
+def assert_same(a, b, label: str):
+    # не бит в бит: pandas суммирует с компенсацией Кэхэна, воркеры — обычным сложением
+    if isinstance(a, tuple):
+        for x, y in zip(a, b):
+            assert_same(x, y, label)
+    elif isinstance(a, dict):
+        for k in a:
+            if a[k] is None or b[k] is None:
+                assert a[k] is b[k], f"{label}: {k}"
+            else:
+                assert np.isclose(a[k], b[k], rtol=1e-9, atol=0), f"{label}: {k} {a[k]} != {b[k]}"
+    else:
+        pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=1e-9)
+
+
+def check(rows: int):
+    parallel.PARALLEL_MIN_ROWS = 1
+    df = make_frame(rows)
+    assert parallel.register(df)
+    filtered = analytics.apply_filters(df, date_from="2021-06-01", regions=["North", "East", "West"])
+    narrower = analytics.apply_filters(filtered, date_to="2023-06-30", customer_types=["B2B"])
+    for label, frame in (("full", df), ("filtered", filtered), ("narrower", narrower)):
+        assert parallel.group_sum(frame, "month", ["sales_amount"]) is not None, f"{label}: not parallel"
+        plain = frame.copy()  # не зарегистрирован -> pandas
+        for name, fn in FUNCS.items():
+            assert_same(fn(frame), fn(plain), f"{label}/{name}")
+        print(f"{label:9} {len(frame):>10,} rows: {len(FUNCS)} aggregations match pandas")
+
+    # колонка переприсвоена после агрегации — кэш не должен отдать старые суммы
+    analytics.monthly_trends(df)
+    df["profit"] = df["profit"] * 2
+    assert_same(analytics.monthly_trends(df), analytics.monthly_trends(df.copy()), "reassigned column")
+    print("reassigned column: no stale results")
+
+    # запись на месте не видна (та же память) — по контракту register() кадр перерегистрируют
+    assert parallel.register(df)
+    before = parallel.group_sum(df, "month", ["sales_amount"])
+    df.loc[0, "sales_amount"] = 1e9
+    assert parallel.group_sum(df, "month", ["sales_amount"]).equals(before), "in-place write: expected stale sums before register()"
+    assert parallel.register(df)
+    assert_same(analytics.monthly_trends(df), analytics.monthly_trends(df.copy()), "in-place write")
+    print("in-place write + register(): no stale results")
+
+    # воркер убит (например, OOM killer) — агрегаты считаются через pandas, без исключения
+    pids = list(parallel._get_pool()._processes)
+    os.kill(pids[0], getattr(signal, "SIGKILL", signal.SIGTERM))
+    assert_same(analytics.monthly_trends(df), analytics.monthly_trends(df.copy()), "killed worker")
+    assert parallel.group_sum(df, "month", ["sales_amount"]) is None
+    print("killed worker: pandas fallback")
+
+
+def bench(rows: int):
+    def timed(fn, repeat=3):
+        best = float("inf")
+        for _ in range(repeat):
+            t = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t)
+        return best
+
+    df = make_frame(rows)
+    t = time.perf_counter()
+    parallel.register(df)
+    parallel.warm_up(wait=True)
+    print(f"{rows:,} rows, {parallel.MAX_WORKERS} workers; register + pool start: {time.perf_counter() - t:.3f}s (once per file)")
+    filtered = analytics.apply_filters(df, regions=["North", "South", "East", "West"])
+    for label, frame in (("full", df), ("filtered", filtered)):
+        if parallel.group_sum(frame, "month", ["sales_amount"]) is None:
+            print(f"{label}: {len(frame):,} rows, below PARALLEL_MIN_ROWS — pandas only")
+            continue
+        plain = frame.copy()
+        if frame is not df:
+            # то, что платит каждое изменение фильтра: новый вид, позиции строк в shared memory
+            fresh = analytics.apply_filters(df, regions=["North", "South", "East", "West"])
+            tq = timed(lambda: analytics.monthly_trends(fresh), repeat=1)
+            tp = timed(lambda: analytics.monthly_trends(plain), repeat=1)
+            print(f"{label:9} {'first call on a new view':28} pandas {tp:.3f}s  parallel {tq:.3f}s")
+        for name in ("monthly_trends", "regional_breakdown", "product_month_pivot_profit", "kpi"):
+            fn = FUNCS[name]
+            fn(frame)  # позиции отфильтрованного вида создаются при первом вызове
+            tp, tq = timed(lambda: fn(plain)), timed(lambda: fn(frame))
+            print(f"{label:9} {name:28} pandas {tp:.3f}s  parallel {tq:.3f}s  x{tp / tq:.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=300_000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--bench", type=int, metavar="ROWS")
+    args = ap.parse_args()
+    parallel.MAX_WORKERS = args.workers
+    if args.bench:
+        bench(args.bench)
+    else:
+        check(args.rows)
+    parallel.shutdown()
@@ -0,0 +1,66 @@
+"""Regression cases for schema parsing (app/parsing.py).
+
+    python tools/check_parsing.py
+
+Run it after touching date formats, the fixed-width decoder or number normalization.
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from parsing import parse_with_schema  # noqa: E402
+
+
+def parse(dates, numbers=None):
+    """parse_with_schema() of a frame with the given raw columns."""
+    n = len(dates)
+    df = pd.DataFrame({
+        "date": dates,
+        "sales_amount": numbers if numbers is not None else ["1"] * n,
+        "cost": ["0"] * n,
+    })
+    return parse_with_schema(df)
+
+
+def check_out_of_range_years():
+    # годы вне datetime64[ns] не должны превращаться в чужие даты
+    # (через numpy, а "1.1.3000" без ведущих нулей — через strptime)
+    bad = ["01.01.3000", "31.12.9999", "05.03.1600", "1.1.3000"]
+    ok, rejected = parse(bad + ["05.03.2024"] * 5)
+    assert ok["date"].eq(pd.Timestamp("2024-03-05")).all(), ok["date"].tolist()
+    assert rejected["value"].tolist() == bad, rejected
+    assert set(rejected["reason"]) == {"unparseable date"}
+    print("out-of-range years: rejected")
+
+
+def check_ambiguous_dates():
+    # день и месяц ≤ 12: '01/02/2024' нельзя читать ни как %d/%m, ни как %m/%d
+    ambiguous = ["01/02/2024", "03/04/2024", "05/06/2024"]
+    ok, rejected = parse(ambiguous)
+    assert ok.empty and rejected["value"].tolist() == ambiguous, rejected
+    # одна однозначная дата в колонке решает за все, даже вне выборки
+    ok, _ = parse(["01/02/2024"] * 500 + ["25/06/2024"])
+    assert ok["date"].iloc[0] == pd.Timestamp("2024-02-01"), ok["date"].iloc[0]
+    ok, _ = parse(["01/02/2024"] * 500 + ["06/25/2024"])
+    assert ok["date"].iloc[0] == pd.Timestamp("2024-01-02"), ok["date"].iloc[0]
+    # разные форматы на разных строках — не двусмысленность
+    ok, rejected = parse(["2024-03-05", "05.03.2024", "5.3.2024", "05/05/2024"])
+    assert rejected.empty and ok["date"].dt.day.eq(5).all(), ok["date"].tolist()
+    print("ambiguous dates: rejected, settled by the column when possible")
+
+
+def check_signs_and_exponents():
+    raw = ["1,5", "2,25", "1e3", "+5", "1,5e3", "-2,5E-1", "+1.234,5"]
+    ok, rejected = parse(["2024-03-05"] * len(raw), raw)
+    assert rejected.empty, rejected
+    assert ok["sales_amount"].tolist() == [1.5, 2.25, 1000.0, 5.0, 1500.0, -0.25, 1234.5], ok["sales_amount"].tolist()
+    print("signs and exponents: parsed in a comma-decimal column")
+
+
+if __name__ == "__main__":
+    check_out_of_range_years()
+    check_ambiguous_dates()
+    check_signs_and_exponents()